@@ -1,13 +1,15 @@
+import asyncio
 import cv2
+import json
 import numpy as np
-from ultralytics import YOLO
 from collections import deque
 from datetime import datetime, timedelta
-from flask import Flask, render_template, Response, request, jsonify, send_from_directory
+from quart import Quart, render_template, Response, request, jsonify, send_from_directory
 import threading
+import multiprocessing
+import queue
 import time
 import os
-import signal
 import atexit
 from werkzeug.utils import secure_filename
 from pathlib import Path
@@ -15,21 +17,27 @@ from pathlib import Path
 # Import Database module
 from database import get_db, init_db
 
+# Import person detection backends
+from detector import create_detector, run_detection_process, pin_to_cpus, map_to_stream
+from frame_ring import SharedFrameRing
+
 # Import configuration
 try:
     from config import (
-        FLASK_CONFIG, CAMERA_CONFIG, MODEL_CONFIG, 
+        FLASK_CONFIG, CAMERA_CONFIG, MODEL_CONFIG, CPU_AFFINITY_CONFIG,
         STATS_CONFIG, SECURITY_CONFIG, get_startup_info, print_routes_info
     )
 except ImportError:
     print("[WARNING] Unable to import config.py, using default configuration")
     FLASK_CONFIG = {'DEBUG': False, 'HOST': '0.0.0.0', 'PORT': 5000, 'THREADED': True}
     CAMERA_CONFIG = {'enabled': True, 'camera_id': 0, 'width': 1280, 'height': 720}
-    MODEL_CONFIG = {'enabled': True, 'model_name': 'yolov8n.pt', 'confidence_threshold': 0.2}
+    MODEL_CONFIG = {'enabled': True, 'model_name': 'yolov8n.pt', 'confidence_threshold': 0.2,
+                    'backend': 'ultralytics', 'backend_model': None, 'detection_process': True}
+    CPU_AFFINITY_CONFIG = {'enabled': False}
     STATS_CONFIG = {'history_maxlen': 100, 'update_interval': 2000}
     SECURITY_CONFIG = {'max_file_size': 500 * 1024 * 1024, 'allowed_image_extensions': {'png', 'jpg', 'jpeg'}}
 
-app = Flask(__name__)
+app = Quart(__name__)
 
 # Configure folders
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -83,7 +91,11 @@ def smooth_data(data, window_size=5):
 class CrowdDensityMonitor:
     """Crowd Density Monitor - Integrates YOLO8 and Real-time Data Statistics"""
     
-    def __init__(self, model_name='yolov8n.pt', camera_id=0, width=1280, height=720, conf=0.2):
+    def __init__(self, model_name='yolov8n.pt', camera_id=0, width=1280, height=720, conf=0.2,
+                 fps=30, detection_interval=3, jpeg_quality=70,
+                 backend='ultralytics', backend_model=None,
+                 detection_process=True, detection_cpus=None,
+                 roi=None, roi_full_frame_interval=30):
         """Initialize YOLO model and camera
         
         Args:
@@ -91,11 +103,29 @@ class CrowdDensityMonitor:
             camera_id: Camera ID
             width: Input resolution width (recommended: 1280)
             height: Input resolution height (recommended: 720)
-            conf: Confidence threshold (default: 0.1, range: 0.1-0.9)
+            conf: Confidence threshold (default: 0.2, range: 0.1-0.9)
+            fps: Camera frame rate
+            detection_interval: Hand every Nth frame to the detector
+            jpeg_quality: JPEG quality of the video stream (1-100)
+            backend: Inference backend ('ultralytics', 'onnx', 'openvino' or 'tensorrt', see detector.py)
+            backend_model: Exported model for the backend (default: detector.DEFAULT_BACKEND_MODELS)
+            detection_process: Run camera detection in a separate process instead of a thread
+            detection_cpus: CPU cores the detection process is pinned to (None = not pinned)
+            roi: (x, y, w, h) region of the frame to detect in (None = full frame)
+            roi_full_frame_interval: With a ROI, every Nth detection covers the full frame
         """
-        # Model initialization
-        self.model = YOLO(model_name)
-        self.upload_model = YOLO(model_name)
+        # Model initialization (detectors return an (N, 5) array: x1, y1, x2, y2, conf)
+        # With detection_process the camera model is loaded in the detection process instead
+        self.detector_args = (backend, model_name, conf, backend_model)
+        self.detection_process = detection_process
+        self.detection_cpus = detection_cpus
+        self.model = None
+        if not detection_process:
+            self.model = create_detector(backend, model_name, conf, backend_model=backend_model)
+        # Uploaded images get their own model, loaded on first use (saves a model's worth
+        # of memory in the main process while nothing is uploaded)
+        self.upload_model = None
+        self.upload_model_lock = threading.Lock()
         
         # Detection parameters
         self.confidence_threshold = conf
@@ -118,7 +148,7 @@ class CrowdDensityMonitor:
                 self.cap = None
         
         if self.cap:
-            self.cap.set(cv2.CAP_PROP_FPS, 30)
+            self.cap.set(cv2.CAP_PROP_FPS, fps)
             self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
             self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
             
@@ -131,7 +161,7 @@ class CrowdDensityMonitor:
         # Detection results
         self.person_count = 0
         self.density = 0
-        self.detections = []
+        self.detections = np.empty((0, 5), np.float32)  # x1, y1, x2, y2, conf
         self.frame_count = 0
         self.inference_time = 0
         
@@ -143,13 +173,73 @@ class CrowdDensityMonitor:
         # Thread lock
         self.lock = threading.Lock()
         
+        # Bumped every time the detection worker publishes a result; /api/realtime uses it
+        # as ETag and keeps the serialized response until it changes
+        self.det_version = 0
+        self.realtime_json_cache = (None, None)  # (version, JSON bytes)
+        
         # Frame for detection
         self.current_frame = None
-        self.frame_for_detection = None
-        self.detection_interval = 3
+        self.detection_interval = detection_interval
+        self.jpeg_quality = jpeg_quality
+        
+        # Frames are downscaled to the model input size (640 on the long side) when handed
+        # to the detector; boxes are scaled back to stream coordinates afterwards
+        self.detection_input_size = 640
+        
+        # Density is people per 10000 px of the camera frame; the frame size is fixed
+        self.inv_area_per_10000 = 10000.0 / (actual_width * actual_height)
+        
+        # Static camera: detect only in the queue region, with a periodic full-frame pass
+        if roi is not None:
+            x, y, w, h = roi
+            w = min(w, actual_width - x)
+            h = min(h, actual_height - y)
+            if x < 0 or y < 0 or w <= 0 or h <= 0:
+                print(f"[WARNING] ROI {roi} is outside the {actual_width}x{actual_height} frame, using full frame")
+                roi = None
+            else:
+                roi = (x, y, w, h)
+        self.roi = roi
+        self.roi_full_frame_interval = max(1, roi_full_frame_interval)
+        self.published_count = 0
+        
+        # The detector gets the ROI plus a margin, so people standing on its edge are
+        # not clipped by the crop and the box-centre test counts them like a full frame
+        self.roi_crop = None
+        if roi is not None:
+            x, y, w, h = roi
+            margin_x, margin_y = w // 4, h // 4
+            crop_x, crop_y = max(0, x - margin_x), max(0, y - margin_y)
+            self.roi_crop = (crop_x, crop_y,
+                             min(actual_width, x + w + margin_x) - crop_x,
+                             min(actual_height, y + h + margin_y) - crop_y)
+            
+            # Ultralytics shrinks its input to the crop, so the crop keeps the full-frame
+            # scale (less compute); the exported backends always run at 640, so the crop
+            # is sent at up to that size instead of being upsampled by the letterbox
+            if backend == 'ultralytics':
+                self.roi_crop_scale = min(1.0, self.detection_input_size / max(actual_width, actual_height))
+            else:
+                self.roi_crop_scale = min(1.0, self.detection_input_size / max(self.roi_crop[2:]))
+        
+        # People outside the ROI are reported once per interval, not on every pass
+        self.roi_outside_max = 0
+        self.last_roi_report_time = datetime.now()
+        self.roi_report_interval = 60
+        
+        # Lock-free shared-memory ring: the stream resizes into a free slot, the
+        # detector reads the latest published one (no lock, no per-frame allocation)
+        self.frame_ring = SharedFrameRing(self.detection_input_size, self.detection_input_size)
+        # The ring has a single writer, but every open /video_feed runs its own stream
+        # generator; they take turns publishing (the detector side stays lock-free)
+        self.publish_lock = threading.Lock()
         
-        # Background detection thread
+        # Background detection thread (and optional detection process feeding it)
         self.detection_thread = None
+        self.detection_proc = None
+        self.result_queue = None
+        self.stop_event = None
         self.stop_detection = False
         
         # Statistics data (by time period)
@@ -220,6 +310,22 @@ class CrowdDensityMonitor:
             print(f"[WARNING] GPIO initialization failed: {e}")
             self.GPIO = None
         
+        # Static overlay label prefixes, rendered once (only values are drawn per frame)
+        self._build_label_overlay()
+        
+        # JPEG encoder for the video stream: TurboJPEG (SIMD libjpeg-turbo) if available
+        try:
+            from turbojpeg import TurboJPEG, TJPF_BGR
+            self.turbo_jpeg = TurboJPEG()
+            self.turbo_pixel_format = TJPF_BGR
+            print("[OK] TurboJPEG encoder enabled")
+        except ImportError:
+            print("[WARNING] PyTurboJPEG not installed, using OpenCV JPEG encoder")
+            self.turbo_jpeg = None
+        except Exception as e:
+            print(f"[WARNING] TurboJPEG initialization failed: {e}")
+            self.turbo_jpeg = None
+        
         # Initialize database
         try:
             self.db = init_db()
@@ -232,12 +338,30 @@ class CrowdDensityMonitor:
         print("Crowd density monitor initialization complete")
         print(f"  - Resolution: {actual_width}x{actual_height}")
         print(f"  - Model: {model_name}")
+        print(f"  - Backend: {backend}")
+        print(f"  - Detection: {'separate process' if detection_process and self.cap else 'thread'}")
         print(f"  - Confidence threshold: {self.confidence_threshold}")
         print("=" * 50)
     
     def start_detection_thread(self):
         """Start background detection thread"""
         self.stop_detection = False
+        
+        # Camera detection runs in its own process, this thread only collects its results
+        if self.cap and self.detection_process:
+            context = multiprocessing.get_context('spawn')
+            self.result_queue = context.Queue(maxsize=1)
+            self.stop_event = context.Event()
+            backend, model_name, conf, backend_model = self.detector_args
+            self.detection_proc = context.Process(
+                target=run_detection_process,
+                args=(self.frame_ring.name, self.detection_input_size, backend, model_name, conf,
+                      backend_model, self.result_queue, self.stop_event, self.detection_cpus),
+                daemon=True
+            )
+            self.detection_proc.start()
+            print("[✓] Detection process started")
+        
         self.detection_thread = threading.Thread(target=self._detection_worker, daemon=True)
         self.detection_thread.start()
         print("[✓] Background detection thread started")
@@ -261,8 +385,15 @@ class CrowdDensityMonitor:
         self.stop_detection = True
         self.stop_button = True
         self.stop_button2 = True
+        if self.detection_proc:
+            self.stop_event.set()
+            self.detection_proc.join(timeout=2)
+            if self.detection_proc.is_alive():
+                self.detection_proc.terminate()
         if self.detection_thread:
             self.detection_thread.join(timeout=2)
+            if not self.detection_thread.is_alive():
+                self.frame_ring.close()
         if self.button_thread:
             self.button_thread.join(timeout=2)
         if self.button2_thread:
@@ -274,11 +405,8 @@ class CrowdDensityMonitor:
         detection_count = 0
         
         while not self.stop_detection:
-            with self.lock:
-                frame_to_detect = self.frame_for_detection
-            
             # If no camera, use simulated data
-            if frame_to_detect is None and not self.cap:
+            if not self.cap:
                 try:
                     # Generate simulated crowd data
                     current_hour = datetime.now().hour
@@ -294,15 +422,15 @@ class CrowdDensityMonitor:
                         base = 15 + np.random.normal(0, 3)
                     
                     person_count = max(0, int(base))
-                    frame_area = 720 * 1280
-                    density = person_count / (frame_area / 10000)
+                    density = person_count * self.inv_area_per_10000
                     
                     # Update detection results and statistics
                     with self.lock:
                         self.person_count = person_count
                         self.density = density
-                        self.detections = []  # No detections in simulated mode
+                        self.detections = np.empty((0, 5), np.float32)  # No detections in simulated mode
                         self.inference_time = 0.05
+                        self.det_version += 1
                         self.density_history.append(density)
                         self.person_count_history.append(person_count)
                         self.timestamp_history.append(datetime.now())
@@ -349,22 +477,43 @@ class CrowdDensityMonitor:
                 continue
             
             # Real detection with camera
-            if frame_to_detect is not None:
-                try:
-                    start_time = time.time()
-                    results = self.model(frame_to_detect, classes=0, conf=self.confidence_threshold, verbose=False)
-                    self.inference_time = time.time() - start_time
-                    detections = results[0].boxes
+            try:
+                result = self._next_detection_result()
+                if result is not None:
+                    detections, inference_time = result
+                    
+                    # Count only people whose box centre is in the ROI (full-frame passes and
+                    # the crop margin also see people outside it); the most seen outside is
+                    # reported periodically, since the queue may have grown past the ROI
+                    if self.roi:
+                        x, y, w, h = self.roi
+                        centers_x = (detections[:, 0] + detections[:, 2]) * 0.5
+                        centers_y = (detections[:, 1] + detections[:, 3]) * 0.5
+                        inside = ((centers_x >= x) & (centers_x < x + w) &
+                                  (centers_y >= y) & (centers_y < y + h))
+                        outside_count = len(detections) - int(inside.sum())
+                        if outside_count:
+                            detections = detections[inside]
+                            self.roi_outside_max = max(self.roi_outside_max, outside_count)
+                        
+                        now = datetime.now()
+                        if (now - self.last_roi_report_time).total_seconds() >= self.roi_report_interval:
+                            if self.roi_outside_max:
+                                print(f"[ROI] Up to {self.roi_outside_max} people detected outside the ROI "
+                                      f"{self.roi} in the last {self.roi_report_interval}s")
+                            self.roi_outside_max = 0
+                            self.last_roi_report_time = now
                     
                     person_count = len(detections)
-                    frame_area = frame_to_detect.shape[0] * frame_to_detect.shape[1]
-                    density = person_count / (frame_area / 10000)
+                    density = person_count * self.inv_area_per_10000
                     
                     # Update detection results and statistics
                     with self.lock:
                         self.detections = detections
+                        self.inference_time = inference_time
                         self.person_count = person_count
                         self.density = density
+                        self.det_version += 1
                         self.density_history.append(density)
                         self.person_count_history.append(person_count)
                         self.timestamp_history.append(datetime.now())
@@ -404,13 +553,62 @@ class CrowdDensityMonitor:
                     
                     detection_count += 1
                     if detection_count % 10 == 0:
-                        print(f"[Detection] Processed {detection_count} times | Latest: {person_count} people | Time: {self.inference_time*1000:.0f}ms")
-                
-                except Exception as e:
-                    print(f"[WARNING] Detection failed: {e}")
+                        print(f"[Detection] Processed {detection_count} times | Latest: {person_count} people | Time: {inference_time*1000:.0f}ms")
+            
+            except Exception as e:
+                print(f"[WARNING] Detection failed: {e}")
             
             time.sleep(0.01)
     
+    def _next_detection_result(self):
+        """Get the next detection result, or None if there is none yet
+        
+        With the detection process the result is taken from its queue; otherwise the
+        latest frame in the ring is detected in this thread.
+        
+        Returns:
+            (detections, inference_time), boxes in stream coordinates
+        """
+        if self.detection_proc:
+            try:
+                result = self.result_queue.get(timeout=0.1)
+            except queue.Empty:
+                if self.detection_proc.is_alive():
+                    return None
+                result = (None, f"exit code {self.detection_proc.exitcode}")
+            
+            # (None, error) means the detection process failed and has exited
+            if result[0] is None:
+                print(f"[ERROR] Detection process stopped ({result[1]}), camera detection disabled")
+                self.detection_proc.join(timeout=2)
+                self.detection_proc = None
+                self.stop_detection = True
+                return None
+            return result
+        
+        # Take the latest published frame; its slot stays reserved until detection ends
+        taken = self.frame_ring.acquire()
+        if taken is None:
+            return None
+        
+        frame, scale, offset, token = taken
+        try:
+            start_time = time.time()
+            detections = self.model(frame)
+            inference_time = time.time() - start_time
+            
+            # Drop the result if the stream overwrote the frame mid-inference
+            if not self.frame_ring.is_intact(token):
+                return None
+            
+            # Map boxes from the downscaled detection frame back to stream coordinates
+            map_to_stream(detections, scale, offset)
+            return detections, inference_time
+        finally:
+            # Release the slot so the stream can write into it again
+            frame = None
+            self.frame_ring.release()
+    
     def blink_led(self, times=3, interval=0.2):
         """LED blink function
         
@@ -520,6 +718,58 @@ class CrowdDensityMonitor:
                 print(f"[WARNING] Button 2 listening failed: {e}")
                 time.sleep(0.1)
     
+    def _build_label_overlay(self):
+        """Render the static label prefixes of the stream overlay into a cached RGBA sprite
+        
+        The sprite is kept as premultiplied BGR plus an inverted alpha plane, so the
+        per-frame blit is two saturating cv2 ops on a small ROI and only the changing
+        values still go through putText.
+        """
+        labels = [
+            ('People Count: ', (10, 30), 1, (0, 255, 0)),
+            ('Density: ', (10, 70), 1, (0, 255, 0)),
+            ('Time: ', (10, 110), 0.8, (0, 255, 0)),
+            ('Inference: ', (10, 150), 0.7, (0, 255, 255)),
+        ]
+        
+        self.label_value_positions = []
+        for text, (x, y), scale, _ in labels:
+            # Pen advance of the prefix (getTextSize alone includes the stroke overhang)
+            advance = (cv2.getTextSize(text + 'x', cv2.FONT_HERSHEY_SIMPLEX, scale, 2)[0][0]
+                       - cv2.getTextSize('x', cv2.FONT_HERSHEY_SIMPLEX, scale, 2)[0][0])
+            self.label_value_positions.append((x + advance, y))
+        
+        height = labels[-1][1][1] + 15
+        width = max(x for x, _ in self.label_value_positions) + 10
+        color = np.zeros((height, width, 3), np.uint8)
+        coverage = np.zeros((height, width, 3), np.uint8)
+        for text, position, scale, text_color in labels:
+            cv2.putText(color, text, position, cv2.FONT_HERSHEY_SIMPLEX, scale, text_color, 2)
+            cv2.putText(coverage, text, position, cv2.FONT_HERSHEY_SIMPLEX, scale, (255, 255, 255), 2)
+        
+        self.label_sprite_color = color
+        self.label_sprite_keep = 255 - coverage
+    
+    def _blit_label_overlay(self, frame):
+        """Alpha-blend the cached label sprite onto the top-left corner of a frame"""
+        height = min(frame.shape[0], self.label_sprite_color.shape[0])
+        width = min(frame.shape[1], self.label_sprite_color.shape[1])
+        roi = frame[:height, :width]
+        cv2.multiply(roi, self.label_sprite_keep[:height, :width], dst=roi, scale=1 / 255)
+        cv2.add(roi, self.label_sprite_color[:height, :width], dst=roi)
+    
+    def encode_jpeg(self, frame, quality=None):
+        """Encode a BGR frame as JPEG bytes
+        
+        Uses TurboJPEG (SIMD DCT/Huffman) when available, otherwise OpenCV.
+        """
+        quality = quality or self.jpeg_quality
+        if self.turbo_jpeg:
+            return self.turbo_jpeg.encode(frame, quality=quality, pixel_format=self.turbo_pixel_format)
+        
+        ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        return buffer.tobytes()
+    
     def generate_frames(self):
         """Generate video stream - with detection boxes and information overlay"""
         detection_frame_counter = 0
@@ -546,8 +796,7 @@ class CrowdDensityMonitor:
                             cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
                 
                 # Encode as JPEG
-                ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 70])
-                frame_data = buffer.tobytes()
+                frame_data = self.encode_jpeg(frame)
                 
                 yield (b'--frame\r\n'
                        b'Content-Type: image/jpeg\r\n\r\n' + frame_data + b'\r\n')
@@ -564,14 +813,22 @@ class CrowdDensityMonitor:
             
             # Provide a frame for detection every N frames
             if detection_frame_counter % self.detection_interval == 0:
-                with self.lock:
-                    self.frame_for_detection = frame.copy()
+                # Resize into a ring slot the detector is not reading (only the ROI crop,
+                # except for every Nth frame, which is sent whole to catch people outside it)
+                detection_scale = min(1.0, self.detection_input_size / max(frame.shape[:2]))
+                with self.publish_lock:
+                    if self.roi and self.published_count % self.roi_full_frame_interval:
+                        x, y, w, h = self.roi_crop
+                        self.frame_ring.publish_resized(frame[y:y + h, x:x + w], self.roi_crop_scale, (x, y))
+                    else:
+                        self.frame_ring.publish_resized(frame, detection_scale)
+                    self.published_count += 1
             
             detection_frame_counter += 1
             self.frame_count += 1
             
-            # Draw detection results on video frame
-            display_frame = frame.copy()
+            # Draw detection results on video frame (the detector has its own copy)
+            display_frame = frame
             with self.lock:
                 detections = self.detections
                 person_count = self.person_count
@@ -582,18 +839,20 @@ class CrowdDensityMonitor:
             # Only draw if drawing is enabled
             if drawing_enabled:
                 # Draw detection boxes
-                for detection in detections:
-                    x1, y1, x2, y2 = detection.xyxy[0]
-                    cv2.rectangle(display_frame, (int(x1), int(y1)), (int(x2), int(y2)), (0, 255, 0), 2)
+                # Convert all boxes to Python ints in one pass
+                for x1, y1, x2, y2 in detections[:, :4].astype(np.int32).tolist():
+                    cv2.rectangle(display_frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
                 
-                # Draw text information
-                cv2.putText(display_frame, f'People Count: {person_count}', (10, 30),
+                # Draw text information (static labels from the cached sprite, values per frame)
+                self._blit_label_overlay(display_frame)
+                count_pos, density_pos, time_pos, inference_pos = self.label_value_positions
+                cv2.putText(display_frame, f'{person_count}', count_pos,
                             cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-                cv2.putText(display_frame, f'Density: {density:.2f}', (10, 70),
+                cv2.putText(display_frame, f'{density:.2f}', density_pos,
                             cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-                cv2.putText(display_frame, f'Time: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}', (10, 110),
+                cv2.putText(display_frame, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), time_pos,
                             cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
-                cv2.putText(display_frame, f'Inference: {inference_time*1000:.0f}ms', (10, 150),
+                cv2.putText(display_frame, f'{inference_time*1000:.0f}ms', inference_pos,
                             cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
             else:
                 # Show "Drawing Disabled" message when drawing is off
@@ -601,8 +860,7 @@ class CrowdDensityMonitor:
                             cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
             
             # Encode as JPEG
-            ret, buffer = cv2.imencode('.jpg', display_frame, [cv2.IMWRITE_JPEG_QUALITY, 70])
-            frame_data = buffer.tobytes()
+            frame_data = self.encode_jpeg(display_frame)
             
             yield (b'--frame\r\n'
                    b'Content-Type: image/jpeg\r\n\r\n' + frame_data + b'\r\n')
@@ -618,21 +876,24 @@ class CrowdDensityMonitor:
         
         try:
             import time
+            with self.upload_model_lock:
+                if self.upload_model is None:
+                    backend, model_name, conf, backend_model = self.detector_args
+                    self.upload_model = create_detector(backend, model_name, conf, backend_model=backend_model)
+            
             start_time = time.time()
-            results = self.upload_model(frame, classes=0, conf=self.confidence_threshold, verbose=False)
+            detections = self.upload_model(frame)
             inference_time = time.time() - start_time
-            detections = results[0].boxes
             
             person_count = len(detections)
-            frame_area = frame.shape[0] * frame.shape[1]
-            density = person_count / (frame_area / 10000)
+            density = person_count * 10000.0 / (frame.shape[0] * frame.shape[1])
             
             print(f"[Uploaded Image] Detection completed | {person_count} people | Time: {inference_time*1000:.0f}ms")
             
-            display_frame = frame.copy()
-            for detection in detections:
-                x1, y1, x2, y2 = detection.xyxy[0]
-                cv2.rectangle(display_frame, (int(x1), int(y1)), (int(x2), int(y2)), (0, 255, 0), 2)
+            # Draw straight onto the decoded image, nothing else reads it afterwards
+            display_frame = frame
+            for x1, y1, x2, y2 in detections[:, :4].astype(np.int32).tolist():
+                cv2.rectangle(display_frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
             
             return display_frame, person_count, density
         
@@ -672,6 +933,19 @@ class CrowdDensityMonitor:
                 "crowd_range": f"Approximately {current_count} people (current)"
             }
     
+    def get_realtime_json(self):
+        """Get real-time statistics as serialized JSON, rebuilt only after a new detection
+        
+        Returns:
+            (version, body): Detection version the body was built from, and the JSON bytes
+        """
+        version = self.det_version
+        cached_version, body = self.realtime_json_cache
+        if cached_version != version:
+            body = json.dumps(self.get_realtime_stats()).encode('utf-8')
+            self.realtime_json_cache = (version, body)
+        return version, body
+    
     def get_history_stats(self):
         """Get historical statistics"""
         with self.lock:
@@ -744,32 +1018,39 @@ def cleanup_gpio():
         except Exception as e:
             print(f"[WARNING] GPIO cleanup error: {e}")
 
-def signal_handler(signum, frame):
-    """Handle signals (SIGINT, SIGTERM)"""
-    print("\n[SIGNAL] Received interrupt signal")
-    cleanup_gpio()
-    if monitor:
-        monitor.stop_detection_thread()
-    print("✓ Exiting...")
-    exit(0)
-
 def init_monitor():
     """Initialize the monitor"""
     global monitor
     try:
+        # Pin before any worker thread starts, so the stream and server threads inherit the cores.
+        # Only with the detection process: an in-thread detector would be confined to app_cpus
+        detection_process = MODEL_CONFIG.get('detection_process', True)
+        affinity_enabled = CPU_AFFINITY_CONFIG.get('enabled', False)
+        if affinity_enabled and not detection_process:
+            print("[WARNING] CPU pinning needs MODEL_CONFIG['detection_process'], not pinned")
+            affinity_enabled = False
+        if affinity_enabled:
+            pin_to_cpus(CPU_AFFINITY_CONFIG.get('app_cpus'), "Server and video stream")
+        
+        # All tunables come from config.py (edit it, or import and adjust it, to switch setups)
         monitor = CrowdDensityMonitor(
-            model_name='yolov8n.pt' if os.path.exists('yolov8n.pt') else 'yolov8n.pt',
-            camera_id=0,
-            width=1280,
-            height=720,
-            conf=0.2
+            model_name=MODEL_CONFIG.get('model_name', 'yolov8n.pt'),
+            camera_id=CAMERA_CONFIG.get('camera_id', 0),
+            width=CAMERA_CONFIG.get('width', 1280),
+            height=CAMERA_CONFIG.get('height', 720),
+            conf=MODEL_CONFIG.get('confidence_threshold', 0.2),
+            fps=CAMERA_CONFIG.get('fps', 30),
+            detection_interval=MODEL_CONFIG.get('detection_interval', 3),
+            jpeg_quality=CAMERA_CONFIG.get('quality', 70),
+            backend=MODEL_CONFIG.get('backend', 'ultralytics'),
+            backend_model=MODEL_CONFIG.get('backend_model'),
+            detection_process=detection_process,
+            detection_cpus=CPU_AFFINITY_CONFIG.get('detection_cpus') if affinity_enabled else None,
+            roi=MODEL_CONFIG.get('roi'),
+            roi_full_frame_interval=MODEL_CONFIG.get('roi_full_frame_interval', 30)
         )
         monitor.start_detection_thread()
         
-        # Register signal handlers for graceful shutdown
-        signal.signal(signal.SIGINT, signal_handler)
-        signal.signal(signal.SIGTERM, signal_handler)
-        
         # Register atexit handler as fallback
         atexit.register(cleanup_gpio)
         
@@ -779,9 +1060,24 @@ def init_monitor():
         monitor = None
 
 
+@app.before_serving
+async def startup():
+    """Initialize the monitor before the server accepts requests (also under hypercorn)"""
+    init_monitor()
+
+
+@app.after_serving
+async def shutdown():
+    """Stop detection and release GPIO once the server stops (SIGINT/SIGTERM)"""
+    print("\n[Shutdown] Stopping monitor...")
+    cleanup_gpio()
+    if monitor:
+        monitor.stop_detection_thread()
+
+
 # ========== Route Definitions ==========
 @app.route('/')
-def index():
+async def index():
     """Home - Real-time Pickup Time Estimation"""
     if monitor:
         data = monitor.get_realtime_stats()
@@ -791,11 +1087,11 @@ def index():
             "crowd_level": "Medium",
             "crowd_range": "Approximately 35-50 people"
         }
-    return render_template('index.html', data=data)
+    return await render_template('index.html', data=data)
 
 
 @app.route('/history')
-def history():
+async def history():
     """Historical Data Page"""
     if monitor:
         data = monitor.get_history_stats()
@@ -809,11 +1105,11 @@ def history():
                 [20, 30, 40, 50]
             ]
         }
-    return render_template('history.html', data=data)
+    return await render_template('history.html', data=data)
 
 
 @app.route('/api/time')
-def api_time():
+async def api_time():
     """Get current server time API"""
     now = datetime.now()
     return jsonify({
@@ -827,10 +1123,20 @@ def api_time():
 
 
 @app.route('/api/realtime')
-def api_realtime():
+async def api_realtime():
     """Get real-time data API"""
     if monitor:
-        return jsonify(monitor.get_realtime_stats())
+        # Detection runs at a few Hz while the page polls faster: answer 304 until it changes
+        etag = str(monitor.det_version)
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            version, body = monitor.get_realtime_json()
+            etag = str(version)
+            response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
     else:
         return jsonify({
             "pickup_time": "8-12 minutes",
@@ -840,7 +1146,7 @@ def api_realtime():
 
 
 @app.route('/api/weekday/<int:weekday>')
-def api_weekday_data(weekday):
+async def api_weekday_data(weekday):
     """Get historical data for a specific weekday
     
     weekday: 0=Monday, 1=Tuesday, ..., 6=Sunday
@@ -854,10 +1160,12 @@ def api_weekday_data(weekday):
         if weekday < 0 or weekday > 6:
             return jsonify({'error': 'Weekday parameter ERROR, should be 0-6'}), 400
         
-        # Get all records for that weekday
-        records = db.get_records_by_weekday(weekday)
+        # Get timestamps and person counts for that weekday as numpy arrays
+        # (SQLite is blocking, so the query runs in the default thread pool)
+        loop = asyncio.get_running_loop()
+        ts_arr, count_arr = await loop.run_in_executor(None, db.get_weekday_arrays, weekday)
         
-        if not records:
+        if len(count_arr) == 0:
             return jsonify({
                 'weekday': weekday,
                 'weekday_name': ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'][weekday],
@@ -870,28 +1178,21 @@ def api_weekday_data(weekday):
                 }
             })
         
-        # Get statistical data  
-        stats = db.get_weekday_stats(weekday)
+        # Format timestamps as ISO strings in one vectorized pass
+        timestamps = ts_arr.astype('datetime64[s]').astype(str).tolist()
+        
+        # Apply stronger moving average smoothing (window size 21, about 20 minutes)
+        smoothed_counts = smooth_data(count_arr.tolist(), window_size=21)
         
         # Format record data, sorted by time
         data = []
-        person_counts = []
-        
-        for record in records:
-            person_counts.append(record['person_count'])
+        for timestamp, person_count in zip(timestamps, smoothed_counts):
             data.append({
-                'timestamp': record['timestamp'],
-                'person_count': record['person_count'],
-                'time': record['timestamp'].split('T')[1][:5] if 'T' in record['timestamp'] else ''
+                'timestamp': timestamp,
+                'person_count': person_count,
+                'time': timestamp[11:16]
             })
         
-        # Apply stronger moving average smoothing (window size 21, about 20 minutes)
-        smoothed_counts = smooth_data(person_counts, window_size=21)
-        
-        for i, item in enumerate(data):
-            if i < len(smoothed_counts):
-                item['person_count'] = smoothed_counts[i]
-        
         # Data sampling: take one data point every 10 records to reduce chart density
         # But ensure we have a reasonable number of data points (at least 24 for hourly overview)
         sample_interval = max(1, len(data) // 100)  # Aim for ~100 data points max
@@ -912,18 +1213,15 @@ def api_weekday_data(weekday):
                 deduped_data.append(item)
                 del seen_times[item['time']]
         
-        # Convert stats to dict if it's a sqlite3.Row object
-        stats_dict = dict(stats) if stats else None
-        
         return jsonify({
             'weekday': weekday,
             'weekday_name': ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'][weekday],
-            'records_count': len(records),
+            'records_count': len(count_arr),
             'data': deduped_data,
             'stats': {
-                'avg_people': round(stats_dict['avg_people'], 1) if stats_dict and stats_dict['avg_people'] else 0,
-                'max_people': stats_dict['max_people'] if stats_dict else 0,
-                'min_people': stats_dict['min_people'] if stats_dict else 0
+                'avg_people': round(float(count_arr.mean()), 1),
+                'max_people': int(count_arr.max()),
+                'min_people': int(count_arr.min())
             }
         })
     
@@ -932,11 +1230,14 @@ def api_weekday_data(weekday):
 
 
 @app.route('/video_feed')
-def video_feed():
+async def video_feed():
     """ Realtime Video Stream"""
     if monitor:
-        return Response(monitor.generate_frames(),
-                        mimetype='multipart/x-mixed-replace; boundary=frame')
+        # Quart pulls each frame of the (blocking) generator in a worker thread
+        response = Response(monitor.generate_frames(),
+                            mimetype='multipart/x-mixed-replace; boundary=frame')
+        response.timeout = None  # The stream never completes, disable the response timeout
+        return response
     else:
         # Return placeholder
         return jsonify({'error': 'Camera not initialized'}), 503
@@ -946,7 +1247,7 @@ def video_feed():
 
 if __name__ == '__main__':
     print("=" * 70)
-    print("Starting integrated Flask server (MC + Frontend)")
+    print("Starting integrated Quart server (MC + Frontend)")
     print("=" * 70)
     print(f"Template folder: {TEMPLATE_FOLDER}")
     print(f"Static folder: {STATIC_FOLDER}")
@@ -966,19 +1267,15 @@ if __name__ == '__main__':
     print("=" * 70)
     
     try:
-        init_monitor()
         port = FLASK_CONFIG.get('PORT', 5000)
         host = FLASK_CONFIG.get('HOST', '0.0.0.0')
         debug = FLASK_CONFIG.get('DEBUG', False)
-        threaded = FLASK_CONFIG.get('THREADED', True)
         
-        print("[OK] Starting Flask server...")
-        app.run(host=host, port=port, debug=debug, threaded=threaded)
-    except KeyboardInterrupt:
-        print("\n[KeyboardInterrupt] Shutting down...")
-        cleanup_gpio()
-        if monitor:
-            monitor.stop_detection_thread()
+        # The monitor is started and stopped by the before_serving/after_serving hooks.
+        # Quart reloads on file changes by default, which re-execs the process without
+        # running after_serving (orphaning the detection process and shared memory)
+        print("[OK] Starting Quart server...")
+        app.run(host=host, port=port, debug=debug, use_reloader=False)
         print("✓ Safely shut down")
     except Exception as e:
         print(f"\n[ERROR] Application error: {e}")
@@ -75,9 +75,26 @@ CAMERA_CONFIG = {
 MODEL_CONFIG = {
     'enabled': True,
     'model_name': 'yolov8n.pt',
-    'confidence_threshold': 0.1,
+    'confidence_threshold': 0.2,
     'detection_interval': 3,  # Perform detection every N frames
     'class_id': 0,  # Detect persons only (class 0 in COCO dataset)
+    # Inference backend: 'ultralytics' (PyTorch), 'onnx' (ONNX Runtime INT8),
+    # 'openvino' (OpenVINO FP16, x86), 'tensorrt' (TensorRT FP16, Jetson)
+    'backend': 'ultralytics',
+    'backend_model': None,  # Exported model for the backend, None = default path (see `python detector.py`)
+    'detection_process': True,  # Run camera detection in a separate process (keeps the stream and API responsive)
+    'roi': None,  # (x, y, w, h) region of the camera frame where the queue is, None = full frame
+    'roi_full_frame_interval': 30,  # With a ROI, every Nth detection still covers the full frame
+}
+
+# CPU affinity configuration (Linux only, cores that do not exist are ignored)
+# Keeps the detector and the stream/API from evicting each other's caches on the same cores.
+# Only applies with MODEL_CONFIG['detection_process']. Off by default: the unpinned baseline
+# lets inference use every core; enable it and measure both detection time and stream FPS
+CPU_AFFINITY_CONFIG = {
+    'enabled': False,
+    'app_cpus': {0, 1},  # Quart server, video stream and statistics threads
+    'detection_cpus': {2, 3, 4, 5, 6, 7},  # Detection process (MODEL_CONFIG['detection_process'])
 }
 
 # Data statistics configuration
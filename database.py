@@ -9,6 +9,8 @@ Table structure description:
 
 import sqlite3
 import os
+import threading
+import numpy as np
 from datetime import datetime, timedelta
 from pathlib import Path
 
@@ -16,6 +18,23 @@ from pathlib import Path
 DB_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_PATH = os.path.join(DB_DIR, 'crowd_data.db')
 
+# Table and index definitions (shared by init_database and clear_all)
+SCHEMA_SQL = '''
+    -- Crowd records table (minimalist design)
+    CREATE TABLE IF NOT EXISTS crowd_records (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp DATETIME NOT NULL UNIQUE,
+        person_count INTEGER NOT NULL,
+        weekday INTEGER NOT NULL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    );
+    
+    -- Covering index to speed up queries
+    -- (weekday lookups are served index-only and already sorted by time;
+    --  timestamp is indexed by its UNIQUE constraint)
+    CREATE INDEX IF NOT EXISTS idx_weekday_ts ON crowd_records(weekday, timestamp, person_count);
+'''
+
 class CrowdDatabase:
     """Crowd data database management class"""
     
@@ -24,10 +43,16 @@ class CrowdDatabase:
         self.db_path = db_path
         self.init_database()
     
-    def get_connection(self):
-        """Get database connection"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+    def get_connection(self, row_factory=sqlite3.Row):
+        """Get database connection
+        
+        Args:
+            row_factory: Row factory for the connection (None returns plain tuples,
+                         which is cheaper for bulk analytical reads)
+        """
+        # Autocommit mode: write batches manage their own BEGIN/COMMIT explicitly
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        conn.row_factory = row_factory
         return conn
     
     def init_database(self):
@@ -35,26 +60,13 @@ class CrowdDatabase:
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        # Create crowd records table (minimalist design)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS crowd_records (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp DATETIME NOT NULL UNIQUE,
-                person_count INTEGER NOT NULL,
-                weekday INTEGER NOT NULL,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
+        # Create crowd records table and indexes
+        cursor.executescript(SCHEMA_SQL)
         
-        # Create index to speed up queries
-        cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_timestamp ON crowd_records(timestamp)
-        ''')
-        cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_weekday ON crowd_records(weekday)
-        ''')
+        # Migration: drop indexes created by older versions
+        cursor.execute('DROP INDEX IF EXISTS idx_timestamp')
+        cursor.execute('DROP INDEX IF EXISTS idx_weekday')
         
-        conn.commit()
         conn.close()
         print(f"[✓] Database initialized: {self.db_path}")
     
@@ -73,7 +85,6 @@ class CrowdDatabase:
                 (timestamp, person_count, weekday)
                 VALUES (?, ?, ?)
             ''', (dt.isoformat(), person_count, weekday))
-            conn.commit()
             return True
         except sqlite3.IntegrityError:
             # Duplicate timestamp, update record
@@ -82,11 +93,58 @@ class CrowdDatabase:
                 SET person_count=?
                 WHERE timestamp=?
             ''', (person_count, dt.isoformat()))
-            conn.commit()
             return False
         finally:
             conn.close()
     
+    def add_records_bulk(self, records, chunk_size=300):
+        """Add many crowd records in a single transaction
+        
+        Rows are written with multi-row INSERT statements of chunk_size rows each,
+        so the Python -> SQLite call overhead is paid once per chunk instead of once
+        per row. Duplicate timestamps update the existing record, like add_record.
+        
+        Args:
+            records: Iterable of (timestamp, person_count, weekday) tuples
+            chunk_size: Rows per INSERT statement (3 parameters per row, kept below
+                        SQLite's default limit of 999 bound variables)
+        
+        Returns:
+            Number of rows written
+        """
+        rows = []
+        for timestamp, person_count, weekday in records:
+            # ISO strings are stored as-is, only parsed when weekday is missing
+            if weekday is None:
+                dt = datetime.fromisoformat(timestamp) if isinstance(timestamp, str) else timestamp
+                weekday = dt.weekday()
+            ts = timestamp if isinstance(timestamp, str) else timestamp.isoformat()
+            rows.append((ts, person_count, weekday))
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute('BEGIN IMMEDIATE')
+            for start in range(0, len(rows), chunk_size):
+                chunk = rows[start:start + chunk_size]
+                placeholders = ', '.join(['(?, ?, ?)'] * len(chunk))
+                params = [value for row in chunk for value in row]
+                cursor.execute(f'''
+                    INSERT INTO crowd_records 
+                    (timestamp, person_count, weekday)
+                    VALUES {placeholders}
+                    ON CONFLICT(timestamp) DO UPDATE SET person_count=excluded.person_count
+                ''', params)
+            cursor.execute('COMMIT')
+            return len(rows)
+        except Exception:
+            if conn.in_transaction:
+                cursor.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+    
     def get_records_by_weekday(self, weekday):
         """Get all records for specified day of week"""
         conn = self.get_connection()
@@ -102,6 +160,27 @@ class CrowdDatabase:
         conn.close()
         return records
     
+    def get_weekday_arrays(self, weekday):
+        """Get timestamps and person counts for specified weekday as numpy arrays
+        
+        Returns:
+            (ts_arr, count_arr): int64 Unix seconds and int32 person counts, sorted by time
+        """
+        conn = self.get_connection(row_factory=None)
+        cursor = conn.cursor()
+        
+        rows = cursor.execute('''
+            SELECT CAST(strftime('%s', timestamp) AS INTEGER), person_count
+            FROM crowd_records 
+            WHERE weekday = ?
+            ORDER BY timestamp
+        ''', (weekday,)).fetchall()
+        conn.close()
+        
+        ts_arr = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+        count_arr = np.fromiter((r[1] for r in rows), dtype=np.int32, count=len(rows))
+        return ts_arr, count_arr
+    
     def get_weekday_stats(self, weekday):
         """Get statistics for specified weekday"""
         conn = self.get_connection()
@@ -121,14 +200,43 @@ class CrowdDatabase:
         conn.close()
         return result
     
+    def get_all_weekday_stats(self):
+        """Get statistics for every weekday with one grouped query
+        
+        Returns:
+            Rows of (weekday, avg_people, max_people, min_people, record_count),
+            ordered by weekday; weekdays without records are omitted
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT 
+                weekday,
+                AVG(person_count) as avg_people,
+                MAX(person_count) as max_people,
+                MIN(person_count) as min_people,
+                COUNT(*) as record_count
+            FROM crowd_records 
+            GROUP BY weekday
+            ORDER BY weekday
+        ''')
+        
+        results = cursor.fetchall()
+        conn.close()
+        return results
+    
     def clear_all(self):
         """Clear all data (for testing only)"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute('DELETE FROM crowd_records')
+        # Drop and recreate the table instead of DELETE, which would journal every page
+        cursor.executescript('DROP TABLE IF EXISTS crowd_records;' + SCHEMA_SQL)
+        
+        # Reclaim the freed pages
+        cursor.execute('VACUUM')
         
-        conn.commit()
         conn.close()
         print("[⚠️] All data cleared")
     
@@ -142,17 +250,21 @@ class CrowdDatabase:
 
 # Global database instance
 db = None
+_db_lock = threading.Lock()
 
 def init_db(db_path=DB_PATH):
     """Initialize global database instance"""
     global db
-    db = CrowdDatabase(db_path)
-    return db
+    with _db_lock:
+        db = CrowdDatabase(db_path)
+        return db
 
 def get_db():
-    """Get global database instance"""
+    """Get global database instance (created lazily, safe to call from request threads)"""
     global db
     if db is None:
-        db = init_db()
+        with _db_lock:
+            # Re-check under the lock so concurrent first calls create only one instance
+            if db is None:
+                db = CrowdDatabase()
     return db
-
@@ -0,0 +1,687 @@
+"""
+Person detection backends for the crowd density monitor
+
+Every detector is called with a BGR frame and returns a (N, 5) float32 array of
+person boxes: x1, y1, x2, y2, confidence (in frame pixel coordinates).
+
+Backends:
+- ultralytics: YOLOv8 .pt model on Ultralytics/PyTorch (default, always available)
+- onnx: INT8-quantized YOLOv8 ONNX model on ONNX Runtime (CPU)
+- openvino: FP16 YOLOv8 OpenVINO IR on the OpenVINO CPU plugin (x86 boards)
+- tensorrt: FP16 YOLOv8 TensorRT engine on CUDA (Jetson boards)
+
+Exported models are created once with `python detector.py [onnx|openvino|tensorrt]`,
+then selected with MODEL_CONFIG['backend'] in config.py.
+"""
+
+import os
+import sys
+import glob
+import math
+import queue
+import signal
+import time
+import cv2
+import numpy as np
+from frame_ring import SharedFrameRing
+
+# Optional: Numba JIT for fused pre/post-processing (falls back to OpenCV/NumPy)
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# Letterbox padding value used by YOLOv8 training
+PAD_VALUE = 114
+
+# Default exported model for each backend
+DEFAULT_BACKEND_MODELS = {
+    'onnx': 'yolov8n_int8.onnx',
+    'openvino': 'yolov8n_openvino_model',
+    'tensorrt': 'yolov8n.engine',
+}
+
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _letterbox_kernel(frame, out, pad_x, pad_y, new_w, new_h):
+        """Fused bilinear resize + pad + BGR->RGB + 0-1 scaling + HWC->CHW
+        
+        Writes every output pixel exactly once, straight from the source frame,
+        without the intermediate resized/padded/transposed copies. Rows run in parallel.
+        """
+        frame_h, frame_w = frame.shape[0], frame.shape[1]
+        out_h = out.shape[1]
+        step_x = frame_w / new_w
+        step_y = frame_h / new_h
+        pad = np.float32(PAD_VALUE / 255.0)
+        inv_255 = np.float32(1.0 / 255.0)
+        
+        # Source columns and weights are the same for every row (half-pixel centers, like cv2.INTER_LINEAR)
+        col_x0 = np.empty(new_w, np.int64)
+        col_x1 = np.empty(new_w, np.int64)
+        col_fx = np.empty(new_w, np.float32)
+        for x in range(new_w):
+            sx = min(max((x + 0.5) * step_x - 0.5, 0.0), frame_w - 1.0)
+            col_x0[x] = int(math.floor(sx))
+            col_x1[x] = min(col_x0[x] + 1, frame_w - 1)
+            col_fx[x] = sx - col_x0[x]
+        
+        for y in prange(out_h):
+            if y < pad_y or y >= pad_y + new_h:
+                out[:, y, :] = pad
+                continue
+            
+            sy = min(max((y - pad_y + 0.5) * step_y - 0.5, 0.0), frame_h - 1.0)
+            y0 = int(math.floor(sy))
+            y1 = min(y0 + 1, frame_h - 1)
+            fy = np.float32(sy - y0)
+            
+            out[:, y, :pad_x] = pad
+            out[:, y, pad_x + new_w:] = pad
+            for x in range(new_w):
+                x0 = col_x0[x]
+                x1 = col_x1[x]
+                fx = col_fx[x]
+                for c in range(3):
+                    # Output channel c (RGB) reads source channel 2 - c (BGR)
+                    top = frame[y0, x0, 2 - c] + (frame[y0, x1, 2 - c] - np.float32(frame[y0, x0, 2 - c])) * fx
+                    bottom = frame[y1, x0, 2 - c] + (frame[y1, x1, 2 - c] - np.float32(frame[y1, x0, 2 - c])) * fx
+                    out[c, y, pad_x + x] = (top + (bottom - top) * fy) * inv_255
+
+
+if NUMBA_AVAILABLE:
+    @njit(fastmath=True, cache=True)
+    def _decode_nms_kernel(pred, conf, iou, scale, pad_x, pad_y, frame_w, frame_h):
+        """Fused person decode + confidence filter + greedy NMS over the YOLOv8 anchors
+        
+        Same result as the NumPy/cv2.dnn.NMSBoxes path (boxes sorted by score, a box
+        is dropped when its IoU with a kept box exceeds iou), without the
+        intermediate arrays or the Python list round-trip. Boxes that end up
+        empty after clipping to the frame are dropped.
+        """
+        num_anchors = pred.shape[1]
+        
+        # Confidence filter (class 0 = person, row 4) and decode into frame coordinates
+        x1 = np.empty(num_anchors, np.float32)
+        y1 = np.empty(num_anchors, np.float32)
+        x2 = np.empty(num_anchors, np.float32)
+        y2 = np.empty(num_anchors, np.float32)
+        neg_scores = np.empty(num_anchors, np.float32)
+        n = 0
+        for i in range(num_anchors):
+            score = pred[4, i]
+            if score <= conf:
+                continue
+            half_w = pred[2, i] * 0.5
+            half_h = pred[3, i] * 0.5
+            bx1 = min(max((pred[0, i] - half_w - pad_x) / scale, 0.0), frame_w)
+            by1 = min(max((pred[1, i] - half_h - pad_y) / scale, 0.0), frame_h)
+            bx2 = min(max((pred[0, i] + half_w - pad_x) / scale, 0.0), frame_w)
+            by2 = min(max((pred[1, i] + half_h - pad_y) / scale, 0.0), frame_h)
+            if bx2 <= bx1 or by2 <= by1:
+                continue
+            x1[n] = bx1
+            y1[n] = by1
+            x2[n] = bx2
+            y2[n] = by2
+            neg_scores[n] = -score
+            n += 1
+        
+        # Highest score first (stable, like NMSBoxes)
+        order = np.argsort(neg_scores[:n], kind='mergesort')
+        
+        # Greedy NMS over the sorted candidates
+        out = np.empty((n, 5), np.float32)
+        kept = 0
+        suppressed = np.zeros(n, np.bool_)
+        for a in range(n):
+            if suppressed[a]:
+                continue
+            k = order[a]
+            out[kept, 0] = x1[k]
+            out[kept, 1] = y1[k]
+            out[kept, 2] = x2[k]
+            out[kept, 3] = y2[k]
+            out[kept, 4] = -neg_scores[k]
+            kept += 1
+            area_k = (x2[k] - x1[k]) * (y2[k] - y1[k])
+            for b in range(a + 1, n):
+                if suppressed[b]:
+                    continue
+                j = order[b]
+                inter_w = min(x2[k], x2[j]) - max(x1[k], x1[j])
+                inter_h = min(y2[k], y2[j]) - max(y1[k], y1[j])
+                if inter_w <= 0 or inter_h <= 0:
+                    continue
+                inter = inter_w * inter_h
+                area_j = (x2[j] - x1[j]) * (y2[j] - y1[j])
+                if inter > iou * (area_k + area_j - inter):
+                    suppressed[b] = True
+        
+        return out[:kept].copy()
+
+
+def letterbox(frame, width, height, out):
+    """Resize frame with unchanged aspect ratio and pad into a model input tensor
+    
+    Args:
+        frame: BGR uint8 image (H, W, 3)
+        width: Model input width
+        height: Model input height
+        out: Preallocated float tensor (3, height, width), filled in place as RGB 0-1
+    
+    Returns:
+        (scale, pad_x, pad_y) used to map boxes back to frame coordinates
+    """
+    frame_h, frame_w = frame.shape[:2]
+    scale = min(width / frame_w, height / frame_h)
+    new_w = int(round(frame_w * scale))
+    new_h = int(round(frame_h * scale))
+    pad_x = (width - new_w) // 2
+    pad_y = (height - new_h) // 2
+    
+    # The kernel only wins by spreading rows over cores; on a single core cv2.resize is faster
+    if NUMBA_AVAILABLE and available_cpus() > 1:
+        _letterbox_kernel(frame, out, pad_x, pad_y, new_w, new_h)
+        return scale, pad_x, pad_y
+    
+    canvas = np.full((height, width, 3), PAD_VALUE, dtype=np.uint8)
+    canvas[pad_y:pad_y + new_h, pad_x:pad_x + new_w] = cv2.resize(
+        frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    
+    # BGR -> RGB, HWC -> CHW, 0-255 -> 0-1
+    np.multiply(canvas[:, :, ::-1].transpose(2, 0, 1), 1 / 255.0, out=out, casting='unsafe')
+    return scale, pad_x, pad_y
+
+
+def decode_person_boxes(output, conf, iou, scale, pad_x, pad_y, frame_shape):
+    """Decode raw YOLOv8 output into person boxes
+    
+    Args:
+        output: Raw model output (1, 84, N): cx, cy, w, h followed by 80 class scores
+        conf: Confidence threshold
+        iou: NMS IoU threshold
+        scale, pad_x, pad_y: Letterbox parameters returned by letterbox()
+        frame_shape: Shape of the original frame
+    
+    Returns:
+        (K, 5) float32 array of x1, y1, x2, y2, confidence
+    """
+    pred = output[0]
+    frame_h, frame_w = frame_shape[:2]
+    
+    if NUMBA_AVAILABLE:
+        return _decode_nms_kernel(np.asarray(pred, dtype=np.float32), conf, iou, scale,
+                                  pad_x, pad_y, frame_w, frame_h)
+    
+    # Class 0 (person) score is row 4
+    scores = pred[4]
+    keep = scores > conf
+    if not np.any(keep):
+        return np.empty((0, 5), dtype=np.float32)
+    
+    cx, cy, w, h = pred[:4, keep]
+    scores = scores[keep]
+    
+    # Map from letterboxed input back to frame coordinates
+    x1 = np.clip((cx - w / 2 - pad_x) / scale, 0, frame_w)
+    y1 = np.clip((cy - h / 2 - pad_y) / scale, 0, frame_h)
+    x2 = np.clip((cx + w / 2 - pad_x) / scale, 0, frame_w)
+    y2 = np.clip((cy + h / 2 - pad_y) / scale, 0, frame_h)
+    
+    xywh = np.stack([x1, y1, x2 - x1, y2 - y1], axis=1)
+    indices = np.asarray(cv2.dnn.NMSBoxes(xywh.tolist(), scores.tolist(), conf, iou)).reshape(-1)
+    
+    boxes = np.stack([x1, y1, x2, y2, scores], axis=1).astype(np.float32)
+    return boxes[indices]
+
+
+class UltralyticsPersonDetector:
+    """YOLOv8 person detector running on Ultralytics (PyTorch)"""
+    
+    def __init__(self, model_name='yolov8n.pt', conf=0.2):
+        """Load YOLO model
+        
+        Args:
+            model_name: YOLO model filename (yolov8n/s/m/l/x.pt)
+            conf: Confidence threshold
+        """
+        from ultralytics import YOLO
+        
+        self.model = YOLO(model_name)
+        self.conf = conf
+    
+    def __call__(self, frame):
+        """Detect persons in a BGR frame"""
+        # Input size follows the frame (stride 32, at most 640): small frames such as ROI
+        # crops are not upscaled, so they cost proportionally less compute
+        imgsz = min(640, -(-max(frame.shape[:2]) // 32) * 32)
+        boxes = self.model(frame, classes=0, conf=self.conf, imgsz=imgsz, verbose=False)[0].boxes
+        return np.hstack([boxes.xyxy.cpu().numpy(), boxes.conf.cpu().numpy()[:, None]]).astype(np.float32)
+
+
+class OnnxPersonDetector:
+    """YOLOv8 person detector running on ONNX Runtime"""
+    
+    def __init__(self, model_path='yolov8n_int8.onnx', conf=0.2, iou=0.7, num_threads=None):
+        """Create ONNX Runtime session
+        
+        Args:
+            model_path: Exported (INT8-quantized) ONNX model
+            conf: Confidence threshold
+            iou: NMS IoU threshold (Ultralytics default: 0.7)
+            num_threads: Intra-op threads (default: default_num_threads())
+        """
+        import onnxruntime as ort
+        
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = num_threads or default_num_threads()
+        self.session = ort.InferenceSession(model_path, sess_options=options,
+                                            providers=['CPUExecutionProvider'])
+        
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.input_height, self.input_width = model_input.shape[2], model_input.shape[3]
+        self.conf = conf
+        self.iou = iou
+        
+        # Input tensor, allocated once and refilled for every frame
+        self.blob = np.empty((1, 3, self.input_height, self.input_width), dtype=np.float32)
+    
+    def __call__(self, frame):
+        """Detect persons in a BGR frame"""
+        scale, pad_x, pad_y = letterbox(frame, self.input_width, self.input_height, self.blob[0])
+        output = self.session.run(None, {self.input_name: self.blob})[0]
+        return decode_person_boxes(output, self.conf, self.iou, scale, pad_x, pad_y, frame.shape)
+
+
+class OpenVinoPersonDetector:
+    """YOLOv8 person detector running on OpenVINO (CPU plugin)"""
+    
+    def __init__(self, model_dir='yolov8n_openvino_model', conf=0.2, iou=0.7, num_threads=None):
+        """Compile OpenVINO model
+        
+        Args:
+            model_dir: Exported OpenVINO model folder (or .xml file)
+            conf: Confidence threshold
+            iou: NMS IoU threshold (Ultralytics default: 0.7)
+            num_threads: Inference threads (default: default_num_threads())
+        """
+        import openvino as ov
+        
+        model_xml = model_dir
+        if os.path.isdir(model_dir):
+            model_xml = glob.glob(os.path.join(model_dir, '*.xml'))[0]
+        
+        # OpenVINO picks AVX2/AVX-512/VNNI kernels for the host CPU
+        core = ov.Core()
+        core.set_property('CPU', {
+            'INFERENCE_NUM_THREADS': num_threads or default_num_threads(),
+            'PERFORMANCE_HINT': 'LATENCY',
+        })
+        self.compiled_model = core.compile_model(core.read_model(model_xml), 'CPU')
+        
+        # Single infer request, reused for every frame
+        self.infer_request = self.compiled_model.create_infer_request()
+        
+        _, _, self.input_height, self.input_width = self.compiled_model.input(0).shape
+        self.conf = conf
+        self.iou = iou
+        
+        # Input tensor, allocated once and refilled for every frame
+        self.blob = np.empty((1, 3, self.input_height, self.input_width), dtype=np.float32)
+    
+    def __call__(self, frame):
+        """Detect persons in a BGR frame"""
+        scale, pad_x, pad_y = letterbox(frame, self.input_width, self.input_height, self.blob[0])
+        self.infer_request.infer({0: self.blob})
+        output = self.infer_request.get_output_tensor(0).data
+        return decode_person_boxes(output, self.conf, self.iou, scale, pad_x, pad_y, frame.shape)
+
+
+class TensorrtPersonDetector:
+    """YOLOv8 person detector running a TensorRT engine on CUDA"""
+    
+    def __init__(self, engine_path='yolov8n.engine', conf=0.2, iou=0.7):
+        """Load TensorRT engine and allocate host/device buffers
+        
+        Args:
+            engine_path: Serialized TensorRT engine (exported with half=True)
+            conf: Confidence threshold
+            iou: NMS IoU threshold (Ultralytics default: 0.7)
+        """
+        import tensorrt as trt
+        import pycuda.driver as cuda
+        
+        self.cuda = cuda
+        cuda.init()
+        
+        # The detector runs in the detection thread, so the CUDA context is pushed per call
+        self.cuda_context = cuda.Device(0).make_context()
+        try:
+            with open(engine_path, 'rb') as f:
+                engine_data = f.read()
+            
+            # Engines exported by Ultralytics start with a length-prefixed JSON metadata block
+            meta_len = int.from_bytes(engine_data[:4], byteorder='little')
+            if 0 < meta_len < len(engine_data) and engine_data[4:5] == b'{':
+                engine_data = engine_data[4 + meta_len:]
+            
+            with trt.Runtime(trt.Logger(trt.Logger.WARNING)) as runtime:
+                self.engine = runtime.deserialize_cuda_engine(engine_data)
+            self.context = self.engine.create_execution_context()
+            self.stream = cuda.Stream()
+            
+            # Pinned host buffers and device buffers, allocated once. TensorRT 8.5+ (and 10,
+            # which dropped bindings) addresses I/O tensors by name; older 8.x uses binding indices
+            self.tensor_api = hasattr(self.engine, 'num_io_tensors')
+            self.bindings = []
+            if self.tensor_api:
+                for i in range(self.engine.num_io_tensors):
+                    name = self.engine.get_tensor_name(i)
+                    host = cuda.pagelocked_empty(tuple(self.engine.get_tensor_shape(name)),
+                                                 trt.nptype(self.engine.get_tensor_dtype(name)))
+                    device = cuda.mem_alloc(host.nbytes)
+                    self.context.set_tensor_address(name, int(device))
+                    if self.engine.get_tensor_mode(name) == trt.TensorIOMode.INPUT:
+                        self.host_input, self.device_input = host, device
+                    else:
+                        self.host_output, self.device_output = host, device
+            else:
+                for i in range(self.engine.num_bindings):
+                    host = cuda.pagelocked_empty(tuple(self.engine.get_binding_shape(i)),
+                                                 trt.nptype(self.engine.get_binding_dtype(i)))
+                    device = cuda.mem_alloc(host.nbytes)
+                    self.bindings.append(int(device))
+                    if self.engine.binding_is_input(i):
+                        self.host_input, self.device_input = host, device
+                    else:
+                        self.host_output, self.device_output = host, device
+        finally:
+            self.cuda_context.pop()
+        
+        _, _, self.input_height, self.input_width = self.host_input.shape
+        self.conf = conf
+        self.iou = iou
+    
+    def __call__(self, frame):
+        """Detect persons in a BGR frame"""
+        scale, pad_x, pad_y = letterbox(frame, self.input_width, self.input_height, self.host_input[0])
+        
+        self.cuda_context.push()
+        try:
+            self.cuda.memcpy_htod_async(self.device_input, self.host_input, self.stream)
+            if self.tensor_api:
+                self.context.execute_async_v3(stream_handle=self.stream.handle)
+            else:
+                self.context.execute_async_v2(bindings=self.bindings, stream_handle=self.stream.handle)
+            self.cuda.memcpy_dtoh_async(self.host_output, self.device_output, self.stream)
+            self.stream.synchronize()
+        finally:
+            self.cuda_context.pop()
+        
+        return decode_person_boxes(self.host_output, self.conf, self.iou, scale, pad_x, pad_y, frame.shape)
+
+
+def available_cpus():
+    """Number of CPU cores the calling process may run on"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def default_num_threads():
+    """Default inference thread count
+    
+    All cores the process is pinned to (see CPU_AFFINITY_CONFIG), otherwise every
+    core but one, which is left for the video stream.
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        allowed = len(os.sched_getaffinity(0))
+        if allowed < (os.cpu_count() or allowed):
+            return allowed
+    return max(1, (os.cpu_count() or 2) - 1)
+
+
+def pin_to_cpus(cpus, label):
+    """Restrict the calling thread, and every thread or process it starts later, to CPU cores
+    
+    Args:
+        cpus: Core ids to run on (ignored if empty or none of them exist)
+        label: Name used in the log message
+    """
+    if not cpus or not hasattr(os, 'sched_setaffinity'):
+        return
+    
+    cpus = set(cpus) & set(range(os.cpu_count() or 1))
+    if not cpus:
+        print(f"[WARNING] {label}: none of the configured CPU cores exist, not pinned")
+        return
+    
+    try:
+        os.sched_setaffinity(0, cpus)
+        print(f"[OK] {label} pinned to CPU cores {sorted(cpus)}")
+    except OSError as e:
+        print(f"[WARNING] {label}: CPU pinning failed: {e}")
+
+
+def cuda_available():
+    """Check whether a CUDA device is available for the TensorRT backend"""
+    try:
+        import pycuda.driver as cuda
+        cuda.init()
+        return cuda.Device.count() > 0
+    except Exception:
+        return False
+
+
+# Detector class and runtime package for each exported-model backend
+BACKENDS = {
+    'onnx': (OnnxPersonDetector, 'onnxruntime'),
+    'openvino': (OpenVinoPersonDetector, 'openvino'),
+    'tensorrt': (TensorrtPersonDetector, 'tensorrt'),
+}
+
+
+def create_detector(backend='ultralytics', model_name='yolov8n.pt', conf=0.2, backend_model=None):
+    """Create a person detector for the configured backend
+    
+    Args:
+        backend: 'ultralytics', 'onnx', 'openvino' or 'tensorrt'
+        model_name: YOLO .pt model (Ultralytics backend and fallback)
+        conf: Confidence threshold
+        backend_model: Exported model for the backend (default: DEFAULT_BACKEND_MODELS)
+    
+    Falls back to the Ultralytics backend if the selected runtime is not installed
+    or its exported model cannot be loaded.
+    """
+    if backend in BACKENDS:
+        detector_class, package = BACKENDS[backend]
+        backend_model = backend_model or DEFAULT_BACKEND_MODELS[backend]
+        try:
+            # TensorRT engines are device-specific: build one on first start if CUDA is present
+            if backend == 'tensorrt' and not os.path.exists(backend_model) and cuda_available():
+                print("[INFO] CUDA detected, exporting TensorRT engine (one-time, may take minutes)")
+                backend_model = export_tensorrt_fp16(model_name)
+
+            detector = detector_class(backend_model, conf=conf)
+            print(f"[OK] {backend} detector loaded: {backend_model}")
+            return detector
+        except ImportError:
+            print(f"[WARNING] {package} not installed, falling back to Ultralytics")
+        except Exception as e:
+            print(f"[WARNING] {backend} model load failed ({e}), falling back to Ultralytics")
+    
+    return UltralyticsPersonDetector(model_name, conf=conf)
+
+
+def map_to_stream(detections, scale, offset):
+    """Map boxes detected on a downscaled (cropped) ring frame back to stream coordinates, in place"""
+    if scale != 1.0:
+        detections[:, :4] /= scale
+    if offset != (0, 0):
+        detections[:, [0, 2]] += offset[0]
+        detections[:, [1, 3]] += offset[1]
+
+
+def run_detection_process(ring_name, ring_size, backend, model_name, conf, backend_model,
+                          result_queue, stop_event, cpus=None):
+    """Detection loop run in a separate process (target of multiprocessing.Process)
+    
+    Reads the latest frame published by the stream in the shared-memory ring, runs
+    the detector on it and sends only the results back, so pre/post-processing never
+    competes with the Quart server and video stream threads for the GIL.
+    
+    Args:
+        ring_name: SharedFrameRing name to attach to
+        ring_size: Max side of the ring slots (must match the stream's ring)
+        backend, model_name, conf, backend_model: Passed to create_detector
+        result_queue: Receives (detections, inference_time) tuples, with boxes
+                      already mapped back to stream coordinates, or a final
+                      (None, error message) if the detector cannot be created
+        stop_event: multiprocessing.Event that ends the loop
+        cpus: CPU cores reserved for detection (None = not pinned)
+    """
+    # Ctrl+C is handled by the parent, which stops this process through stop_event
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    
+    # Pin before the detector creates its inference threads, so they inherit the cores
+    pin_to_cpus(cpus, "Detection process")
+    
+    ring = SharedFrameRing(ring_size, ring_size, name=ring_name)
+    try:
+        model = create_detector(backend, model_name, conf, backend_model=backend_model)
+    except Exception as e:
+        # Tell the parent instead of dying silently while it waits for results
+        print(f"[ERROR] Detection process could not load the model: {e}")
+        result_queue.put((None, str(e)))
+        ring.close()
+        return
+    print(f"[OK] Detection process started (pid {os.getpid()}, {type(model).__name__})")
+    
+    while not stop_event.is_set():
+        taken = ring.acquire()
+        if taken is None:
+            stop_event.wait(0.01)
+            continue
+        
+        frame, scale, offset, token = taken
+        try:
+            start_time = time.time()
+            detections = model(frame)
+            inference_time = time.time() - start_time
+            
+            # Drop the result if the stream overwrote the frame mid-inference
+            if not ring.is_intact(token):
+                continue
+            
+            map_to_stream(detections, scale, offset)
+            
+            # Main process is behind: replace the queued result so it always gets the latest
+            try:
+                result_queue.put_nowait((detections, inference_time))
+            except queue.Full:
+                try:
+                    result_queue.get_nowait()
+                except queue.Empty:
+                    pass  # Taken by the main process in the meantime
+                try:
+                    result_queue.put_nowait((detections, inference_time))
+                except queue.Full:
+                    pass
+        except Exception as e:
+            print(f"[WARNING] Detection failed: {e}")
+        finally:
+            frame = None
+            ring.release()
+    
+    ring.close()
+
+
+def export_onnx_int8(model_name='yolov8n.pt', output_path='yolov8n_int8.onnx',
+                     calibration_dir='calibration_frames', imgsz=640):
+    """Export a YOLOv8 model to ONNX and quantize it to INT8 (one-time step)
+    
+    Args:
+        model_name: YOLO .pt model to export
+        output_path: Quantized ONNX model to write
+        calibration_dir: Folder of representative frames captured from the camera
+                         (*.jpg / *.png); static quantization is calibrated on them
+        imgsz: Model input size
+    
+    Returns:
+        Path of the quantized model
+    """
+    from ultralytics import YOLO
+    from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+    
+    fp32_path = YOLO(model_name).export(format='onnx', imgsz=imgsz)
+    
+    image_paths = sorted(glob.glob(os.path.join(calibration_dir, '*.jpg')) +
+                         glob.glob(os.path.join(calibration_dir, '*.png')))
+    if not image_paths:
+        raise ValueError(f"No calibration frames found in {calibration_dir}")
+    
+    class CalibrationReader(CalibrationDataReader):
+        """Feeds letterboxed calibration frames to the quantizer"""
+        
+        def __init__(self):
+            self.paths = iter(image_paths)
+        
+        def get_next(self):
+            for path in self.paths:
+                frame = cv2.imread(path)
+                if frame is None:
+                    continue
+                blob = np.empty((1, 3, imgsz, imgsz), dtype=np.float32)
+                letterbox(frame, imgsz, imgsz, blob[0])
+                return {'images': blob}
+            return None
+    
+    quantize_static(fp32_path, output_path, CalibrationReader(),
+                    quant_format=QuantFormat.QDQ,
+                    activation_type=QuantType.QUInt8,
+                    weight_type=QuantType.QInt8)
+    
+    print(f"[OK] INT8 ONNX model written: {output_path} ({len(image_paths)} calibration frames)")
+    return output_path
+
+
+def export_openvino_fp16(model_name='yolov8n.pt', imgsz=640):
+    """Export a YOLOv8 model to FP16 OpenVINO IR (one-time step)
+    
+    Returns:
+        Path of the exported model folder
+    """
+    from ultralytics import YOLO
+    
+    output_path = YOLO(model_name).export(format='openvino', half=True, imgsz=imgsz)
+    print(f"[OK] FP16 OpenVINO model written: {output_path}")
+    return output_path
+
+
+def export_tensorrt_fp16(model_name='yolov8n.pt', imgsz=640):
+    """Export a YOLOv8 model to an FP16 TensorRT engine on this device (one-time step)
+    
+    Returns:
+        Path of the exported engine
+    """
+    from ultralytics import YOLO
+    
+    output_path = YOLO(model_name).export(format='engine', half=True, device=0, imgsz=imgsz)
+    print(f"[OK] FP16 TensorRT engine written: {output_path}")
+    return output_path
+
+
+if __name__ == '__main__':
+    # Usage: python detector.py [onnx|openvino|tensorrt]
+    target = sys.argv[1] if len(sys.argv) > 1 else 'onnx'
+    if target == 'openvino':
+        export_openvino_fp16()
+    elif target == 'tensorrt':
+        export_tensorrt_fp16()
+    else:
+        export_onnx_int8()
@@ -0,0 +1,152 @@
+"""
+Lock-free frame handoff between the video stream and the detector
+
+The stream (single writer) downscales every Nth camera frame into a slot of a
+shared-memory ring; the detector (single reader) picks up the latest published
+slot. Both sides only touch a few int64 header fields, so neither takes a lock
+and no frame is allocated or copied per handoff. Several writer threads must
+serialize publish_resized() among themselves; the reader never waits for them.
+
+Three slots are used (triple buffering): the writer always has a slot that is
+neither the published one nor the one being read. Every slot carries a
+sequence number that is odd while the slot is being written, so the reader
+can verify afterwards that the frame it used was not overwritten.
+
+The ring lives in multiprocessing.shared_memory, so the reader may also run in
+another process attached by name.
+"""
+
+import numpy as np
+import cv2
+from multiprocessing import shared_memory
+
+SLOTS = 3
+
+# Header layout (int64 fields)
+_PUBLISHED = 0      # Slot holding the latest frame (-1 = none yet)
+_READING = 1        # Slot claimed by the reader (-1 = none)
+_FRAME_NO = 2       # Number of frames published so far
+_SLOT_FIELDS = 3    # Followed by SLOTS x (seq, height, width, offset_x, offset_y)
+_FIELDS_PER_SLOT = 5
+_HEADER_FIELDS = _SLOT_FIELDS + SLOTS * _FIELDS_PER_SLOT
+_HEADER_BYTES = 256  # int64 header + float64 scale per slot, rounded up
+
+
+class SharedFrameRing:
+    """Shared-memory ring of detection frames (one writer, one reader)"""
+    
+    def __init__(self, max_height=640, max_width=640, name=None):
+        """Create a new ring, or attach to an existing one by name
+        
+        Args:
+            max_height: Largest frame height a slot can hold
+            max_width: Largest frame width a slot can hold
+            name: Shared memory block name to attach to (None creates a new block)
+        """
+        self.slot_bytes = max_height * max_width * 3
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=_HEADER_BYTES + SLOTS * self.slot_bytes)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        
+        self.header = np.ndarray((_HEADER_FIELDS,), np.int64, buffer=self.shm.buf)
+        self.scales = np.ndarray((SLOTS,), np.float64, buffer=self.shm.buf,
+                                 offset=_HEADER_FIELDS * 8)
+        self.max_height = max_height
+        self.max_width = max_width
+        self.last_frame_no = 0  # Reader side: last frame number taken
+        
+        if self.owner:
+            self.header[:] = 0
+            self.header[_PUBLISHED] = -1
+            self.header[_READING] = -1
+    
+    @property
+    def name(self):
+        """Shared memory block name (pass to SharedFrameRing(name=...) to attach)"""
+        return self.shm.name
+    
+    def _slot_view(self, slot, height, width):
+        """NumPy view of a slot as a contiguous (height, width, 3) uint8 image"""
+        return np.ndarray((height, width, 3), np.uint8, buffer=self.shm.buf,
+                          offset=_HEADER_BYTES + slot * self.slot_bytes)
+    
+    def publish_resized(self, frame, scale, offset=(0, 0)):
+        """Writer: resize a frame into a free slot and publish it
+        
+        Args:
+            frame: BGR frame from the camera (or a region of it)
+            scale: Resize factor (the resized frame must fit in max_height x max_width)
+            offset: (x, y) of the region in the camera frame, for mapping boxes back
+        """
+        header = self.header
+        published = header[_PUBLISHED]
+        reading = header[_READING]
+        slot = next(s for s in range(SLOTS) if s != published and s != reading)
+        
+        height = int(round(frame.shape[0] * scale))
+        width = int(round(frame.shape[1] * scale))
+        seq_field = _SLOT_FIELDS + slot * _FIELDS_PER_SLOT
+        
+        header[seq_field] += 1  # Odd: slot is being written
+        cv2.resize(frame, (width, height), dst=self._slot_view(slot, height, width),
+                   interpolation=cv2.INTER_LINEAR)
+        header[seq_field + 1] = height
+        header[seq_field + 2] = width
+        header[seq_field + 3] = offset[0]
+        header[seq_field + 4] = offset[1]
+        self.scales[slot] = scale
+        header[seq_field] += 1  # Even: slot is stable
+        
+        header[_PUBLISHED] = slot
+        header[_FRAME_NO] += 1
+    
+    def acquire(self):
+        """Reader: claim the latest published frame if it has not been taken yet
+        
+        Returns:
+            (frame, scale, offset, token) or None; frame is a view into shared memory
+            that stays valid until release(), offset is the (x, y) passed to
+            publish_resized(), token is passed to is_intact()
+        """
+        header = self.header
+        frame_no = header[_FRAME_NO]
+        if frame_no == self.last_frame_no:
+            return None
+        
+        slot = int(header[_PUBLISHED])
+        header[_READING] = slot
+        seq_field = _SLOT_FIELDS + slot * _FIELDS_PER_SLOT
+        seq = int(header[seq_field])
+        if seq % 2:
+            # The writer reused the slot before the claim was visible; try next time
+            header[_READING] = -1
+            return None
+        
+        self.last_frame_no = frame_no
+        frame = self._slot_view(slot, int(header[seq_field + 1]), int(header[seq_field + 2]))
+        offset = (int(header[seq_field + 3]), int(header[seq_field + 4]))
+        return frame, float(self.scales[slot]), offset, (slot, seq)
+    
+    def is_intact(self, token):
+        """Reader: check that a claimed frame was not overwritten while in use"""
+        slot, seq = token
+        return self.header[_SLOT_FIELDS + slot * _FIELDS_PER_SLOT] == seq
+    
+    def release(self):
+        """Reader: give the claimed slot back to the writer"""
+        self.header[_READING] = -1
+    
+    def close(self):
+        """Detach from the shared memory (and free it if this ring created it)"""
+        # Drop the NumPy views first, SharedMemory refuses to close while they exist
+        self.header = None
+        self.scales = None
+        try:
+            self.shm.close()
+        except BufferError:
+            # A frame view is still referenced somewhere; the mapping goes away with it
+            pass
+        if self.owner:
+            self.shm.unlink()
@@ -5,23 +5,29 @@ Creates realistic records across two weeks with time-based traffic patterns.
 
 import sqlite3
 import os
-from datetime import datetime, timedelta
+from datetime import datetime
 import numpy as np
 
 # Import database module
 from database import CrowdDatabase, DB_PATH
 
-def generate_historical_data():
+def generate_historical_data(seed=42):
     """
     Generate historical crowd data for the system.
     Time range: 2025-12-01 to 2025-12-14 (two weeks)
     Opening time: 07:00 daily
     Closing time: 23:55 daily
     Recording interval: 1 minute (realistic data frequency)
+    
+    Args:
+        seed: Random seed, the same seed always generates the same data
     """
     
     db = CrowdDatabase(DB_PATH)
     
+    # Single PCG64 generator for all random samples
+    rng = np.random.default_rng(seed)
+    
     # Clear old data
     db.clear_all()
     
@@ -33,98 +39,102 @@ def generate_historical_data():
     # Lunch: 11-1 pm (big peak) 
     # Evening: 5-7 pm (medium peak)
     
-    def get_base_people_count(hour, weekday):
+    def get_base_people_count(hours, weekdays):
         """
-        Get base people count based on hour and weekday
+        Get base people counts based on hour and weekday (vectorized over arrays)
         weekday: 0=Monday, 1=Tuesday, ..., 6=Sunday
         """
         
         # Base time factor (reduced normal distribution standard deviation for smoother fluctuation)
-        if 7 <= hour < 8:  # 7-8 am
-            base = 35 + np.random.normal(0, 2)
-        elif 8 <= hour < 9:  # 8-9 am (increased flow)
-            base = 50 + np.random.normal(0, 2.5)
-        elif 9 <= hour < 11:  # Morning
-            base = 20 + np.random.normal(0, 1)
-        elif 11 <= hour < 13:  # Lunch 11am-1pm (peak)
-            base = 85 + np.random.normal(0, 4)
-        elif 13 <= hour < 17:  # Afternoon
-            base = 22 + np.random.normal(0, 1.5)
-        elif 17 <= hour < 19:  # Evening 5-7pm (medium peak)
-            base = 65 + np.random.normal(0, 3)
-        elif 19 <= hour < 22:  # Night
-            base = 28 + np.random.normal(0, 1.5)
-        else:  # After 10pm
-            base = 10 + np.random.normal(0, 0.5)
+        periods = [
+            (hours >= 7) & (hours < 8),    # 7-8 am
+            (hours >= 8) & (hours < 9),    # 8-9 am (increased flow)
+            (hours >= 9) & (hours < 11),   # Morning
+            (hours >= 11) & (hours < 13),  # Lunch 11am-1pm (peak)
+            (hours >= 13) & (hours < 17),  # Afternoon
+            (hours >= 17) & (hours < 19),  # Evening 5-7pm (medium peak)
+            (hours >= 19) & (hours < 22),  # Night
+        ]
+        mean = np.select(periods, [35, 50, 20, 85, 22, 65, 28], default=10)  # After 10pm: 10
+        std = np.select(periods, [2, 2.5, 1, 4, 1.5, 3, 1.5], default=0.5)
+        base = mean + rng.standard_normal(len(hours)) * std
         
         # Weekend traffic is relatively lower (Saturday, Sunday)
-        if weekday >= 5:  # Saturday, Sunday
-            base = base * 0.65
+        base = np.where(weekdays >= 5, base * 0.65, base)
         # Wednesday, Thursday has more traffic
-        elif weekday in [2, 3]:  # Wednesday, Thursday
-            base = base * 1.18
+        base = np.where((weekdays == 2) | (weekdays == 3), base * 1.18, base)
         # Monday, Tuesday, Friday are normal
         
-        return max(int(base), 0)
+        return np.maximum(base.astype(np.int64), 0)
     
     # Generate data
-    current_time = start_date
-    record_count = 0
-    
     print("=" * 60)
     print("Starting historical crowd data generation...")
     print(f"Time range: {start_date.strftime('%Y-%m-%d %H:%M')} ~ {end_date.strftime('%Y-%m-%d %H:%M')}")
     print("=" * 60)
     
-    while current_time <= end_date:
-        hour = current_time.hour
-        weekday = current_time.weekday()
-        
-        # Only generate data during business hours (7:00 - 23:55)
-        if 7 <= hour <= 23:
-            person_count = get_base_people_count(hour, weekday)
-            
-            # Random fluctuation ±5% (reduced fluctuation for smoother curves)
-            person_count = int(person_count * np.random.uniform(0.95, 1.05))
-            person_count = max(person_count, 0)
-            
-            # Add to database
-            try:
-                db.add_record(current_time, person_count, weekday)
-                record_count += 1
-                
-                if record_count % 500 == 0:
-                    print(f"✓ Generated {record_count:5d} records | Time: {current_time.strftime('%Y-%m-%d %H:%M')} | People: {person_count:3d}")
-            
-            except Exception as e:
-                print(f"✗ Add record failed: {e}")
-        
-        # Advance by 1 minute (more realistic data interval)
-        current_time += timedelta(minutes=1)
+    # Only generate data during business hours (7:00 - 23:55): build each day's
+    # business minutes directly so closed hours are never visited
+    # (1 minute: realistic data frequency)
+    days = np.arange(np.datetime64(start_date, 'D'), np.datetime64(end_date, 'D') + 1)
+    day_minutes = np.arange(7 * 60, 24 * 60)
+    minutes = (days[:, None] + day_minutes.astype('timedelta64[m]')[None, :]).ravel()
+    hours = np.tile(day_minutes // 60, len(days))
     
-    print("=" * 60)
-    print("✓ Data generation complete!")
-    print(f"  - Total records: {record_count}")
-    print(f"  - Database location: {DB_PATH}")
-    print(f"  - Database size: {db.get_database_size():.2f} MB")
-    print("=" * 60)
+    # Trim to the exact time range (minutes are sorted)
+    first = minutes.searchsorted(np.datetime64(start_date, 'm'))
+    last = minutes.searchsorted(np.datetime64(end_date, 'm'), side='right')
+    minutes = minutes[first:last]
+    hours = hours[first:last]
+    
+    # Day 0 of datetime64 (1970-01-01) is a Thursday, weekday 3
+    weekdays = (minutes.astype('datetime64[D]').astype(np.int64) + 3) % 7
     
-    # Print statistics
-    print("\nStatistics by day of week:")
-    print("-" * 60)
+    # Format all ISO timestamps in one vectorized pass
+    timestamps = minutes.astype('datetime64[s]').astype(str).tolist()
+    
+    person_counts = get_base_people_count(hours, weekdays)
+    
+    # Random fluctuation ±5% (reduced fluctuation for smoother curves)
+    person_counts = (person_counts * rng.uniform(0.95, 1.05, len(person_counts))).astype(np.int64)
+    person_counts = np.maximum(person_counts, 0)
+    
+    # Rows are written to the database in one bulk insert
+    rows = zip(timestamps, person_counts.tolist(), weekdays.tolist())
+    
+    # Add to database
+    try:
+        record_count = db.add_records_bulk(rows)
+    except Exception as e:
+        print(f"✗ Add records failed: {e}")
+        record_count = 0
+    
+    # Build the summary and statistics report, then write it with a single print
+    lines = [
+        "=" * 60,
+        "✓ Data generation complete!",
+        f"  - Total records: {record_count}",
+        f"  - Database location: {DB_PATH}",
+        f"  - Database size: {db.get_database_size():.2f} MB",
+        "=" * 60,
+        "",
+        "Statistics by day of week:",
+        "-" * 60,
+    ]
     
     weekday_names = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
     
-    for weekday in range(7):
-        stats = db.get_weekday_stats(weekday)
-        
-        if stats and stats['record_count'] > 0:
-            print(f"{weekday_names[weekday]}")
-            print(f"  Records: {stats['record_count']}")
-            print(f"  Average: {stats['avg_people']:.1f} people")
-            print(f"  Peak: {stats['max_people']} people")
-            print(f"  Minimum: {stats['min_people']} people")
-            print()
+    for stats in db.get_all_weekday_stats():
+        lines += [
+            f"{weekday_names[stats['weekday']]}",
+            f"  Records: {stats['record_count']}",
+            f"  Average: {stats['avg_people']:.1f} people",
+            f"  Peak: {stats['max_people']} people",
+            f"  Minimum: {stats['min_people']} people",
+            "",
+        ]
+    
+    print("\n".join(lines))
 
 
 if __name__ == '__main__':